@@ -1,8 +1,9 @@
-import pygame
 import numpy as np
-from flappy_bird_game_AI import FlappyBirdGameAI, Action, Point, BLOCK_SIZE
-import matplotlib.pyplot as plt
+from flappy_bird_game_AI import FlappyBirdGameAI, Action, Point, GameConfig
 import pickle
+import heapq
+from transition_model import TransitionModel
+from training_statistics import TrainingStatistics
 
 class Agent:
     NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR = 20
@@ -10,19 +11,24 @@ class Agent:
     num_states = 3 * 4 * NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR
     num_actions = 3
 
-    def __init__(self, alpha=0.1, gamma=0.995):
+    def __init__(self, alpha=0.1, gamma=0.995, config=None):
         self.alpha = alpha
         self.gamma = gamma
+        self.config = config if config is not None else GameConfig()
+        # the class attributes describe the default configuration
+        self.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR = self.config.distance_bins
+        self.num_states = 3 * 4 * self.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR
         self.states_dictionary = self.get_dictionary_for_tuple_to_index_conversion()
         self.Q = np.zeros((self.num_states, self.num_actions))
         self.policy = np.zeros(self.num_states)
+        self.state_visits = np.zeros(self.num_states, dtype=np.int64)
 
     def get_dictionary_for_tuple_to_index_conversion(self):
         dictionary = {}
         index = 0
         for i in range(3):
             for j in range(4):
-                for k in range(20):
+                for k in range(self.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR):
                     dictionary[(i, j, k)] = index
                     index += 1
         return dictionary
@@ -31,21 +37,30 @@ class Agent:
         with open(file_name, 'wb') as f:
             pickle.dump(self.Q, f)
 
+    def check_q(self, Q):
+        # a table trained with another distance_bins has another row count and would be read through the wrong state layout
+        if np.shape(Q) != (self.num_states, self.num_actions):
+            raise ValueError('expected a Q table of shape ' + str((self.num_states, self.num_actions)) + ' for distance_bins=' +
+                             str(self.config.distance_bins) + ', got ' + str(np.shape(Q)))
+        return Q
+
     def load_policy(self, file_name):
         with open(file_name, 'rb') as f:
-            self.Q = pickle.load(f)
+            self.Q = self.check_q(pickle.load(f))
 
     def get_state(self, game):
         distance_bins = np.linspace(0, game.w, self.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR)
+        block_size = self.config.block_size
+        gap = self.config.tube_gap * block_size // 2
 
         bird_height = game.bird.y
 
         # non-collision, upper-collision, lower-collision
         bird_collision_case = 0
 
-        if bird_height < 2 * BLOCK_SIZE:
+        if bird_height < 2 * block_size:
             bird_collision_case = 1
-        elif bird_height > game.h - 2 * BLOCK_SIZE:
+        elif bird_height > game.h - 2 * block_size:
             bird_collision_case = 2
 
         next_tube_x, next_tube_y = game.w, game.h // 2
@@ -60,7 +75,7 @@ class Agent:
         # above or upper
         if bird_tube_height_difference >= 0:
             # upper
-            if np.abs(bird_tube_height_difference) <= 5 * BLOCK_SIZE:
+            if np.abs(bird_tube_height_difference) <= gap:
                 bird_tube_height_case = 0
             # above
             else:
@@ -68,7 +83,7 @@ class Agent:
         # below or lower
         else:
             # lower
-            if np.abs(bird_tube_height_difference) <= 5 * BLOCK_SIZE:
+            if np.abs(bird_tube_height_difference) <= gap:
                 bird_tube_height_case = 2
             # below
             else:
@@ -78,6 +93,28 @@ class Agent:
 
         return self.states_dictionary[(bird_collision_case, bird_tube_height_case, next_tube_distance_class)], (bird_collision_case, bird_tube_height_case, next_tube_distance_class)
     
+    def get_state_batch(self, bird_y, next_tube_dx, next_tube_y, w=None, h=None):
+        # vectorized get_state over arrays of raw positions
+        w = self.config.w if w is None else w
+        h = self.config.h if h is None else h
+        distance_bins = np.linspace(0, w, self.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR)
+        block_size = self.config.block_size
+        gap = self.config.tube_gap * block_size // 2
+
+        bird_y = np.asarray(bird_y)
+        bird_tube_height_difference = bird_y - np.asarray(next_tube_y)
+
+        bird_collision_case = np.zeros(bird_y.shape, dtype=np.int64)
+        bird_collision_case[bird_y < 2 * block_size] = 1
+        bird_collision_case[bird_y > h - 2 * block_size] = 2
+
+        far = np.abs(bird_tube_height_difference) > gap
+        bird_tube_height_case = np.where(bird_tube_height_difference >= 0, np.where(far, 1, 0), np.where(far, 3, 2))
+
+        next_tube_distance_class = np.minimum(np.digitize(next_tube_dx, distance_bins), self.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR - 1)
+
+        return (bird_collision_case * 4 + bird_tube_height_case) * self.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR + next_tube_distance_class
+
     def build_policy(self):
         for state in range(self.num_states):
             self.policy[state] = np.argmax(self.Q[state, :])
@@ -99,15 +136,17 @@ class Agent:
         self.Q[state, action] = self.Q[state, action] + self.alpha * (reward + self.gamma * np.max(self.Q[next_state, :]) - self.Q[state, action])
 
 
-    def temporal_difference_train(self, game, episodes, epsilon_start=1.0, epsilon_end=0.001, epsilon_decay=0.995, verbose=False):
+    def temporal_difference_train(self, game, episodes, epsilon_start=1.0, epsilon_end=0.001, epsilon_decay=0.995, verbose=False, statistics=None):
         epsilon = epsilon_start
-        scores = []
+        if statistics is None:
+            statistics = TrainingStatistics()
 
         if verbose:
+            import matplotlib.pyplot as plt
             plt.ion()
             fig = plt.figure()
             ax = fig.add_subplot(111)
-            line1, = ax.plot(scores)
+            line1, = ax.plot([])
             plt.show()
 
         for episode in range(episodes):
@@ -135,38 +174,45 @@ class Agent:
 
             print("Episode: " + str(episode) + " Score: " + str(score))
 
-            scores.append(score)
+            statistics.record(score, game.frame_count, epsilon)
 
             if epsilon > epsilon_end:
                 epsilon *= epsilon_decay
 
             if verbose:
-                line1.set_ydata(scores)
-                line1.set_xdata(range(len(scores)))
+                recent_scores = statistics.rolling_scores()
+                line1.set_ydata(recent_scores)
+                line1.set_xdata(range(statistics.episodes - len(recent_scores), statistics.episodes))
                 ax.relim()
                 ax.autoscale_view(True,True,True)
                 plt.draw()
                 plt.pause(0.01)
 
+        statistics.flush()
+
         if verbose:
             plt.ioff()
             plt.show()
 
+        return statistics
+
     
     def update_q_sarsa(self, state, action, reward, next_state, next_action):
         current_estimate = self.Q[state][action]
         next_estimate = self.Q[next_state][next_action]
         self.Q[state][action] += self.alpha * (reward + self.gamma * next_estimate - current_estimate)
 
-    def sarsa_train(self, game, episodes, epsilon_start=1.0, epsilon_end=0.001, epsilon_decay=0.995, verbose=False):
+    def sarsa_train(self, game, episodes, epsilon_start=1.0, epsilon_end=0.001, epsilon_decay=0.995, verbose=False, statistics=None):
         epsilon = epsilon_start
-        scores = []
+        if statistics is None:
+            statistics = TrainingStatistics()
 
         if verbose:
+            import matplotlib.pyplot as plt
             plt.ion()
             fig = plt.figure()
             ax = fig.add_subplot(111)
-            line1, = ax.plot(scores)
+            line1, = ax.plot([])
             plt.show()
 
         for episode in range(episodes):
@@ -191,29 +237,123 @@ class Agent:
 
             print("Episode: " + str(episode) + " Score: " + str(score))
 
-            scores.append(score)
+            statistics.record(score, game.frame_count, epsilon)
 
             if epsilon > epsilon_end:
                 epsilon *= epsilon_decay
 
             if verbose:
-                line1.set_ydata(scores)
-                line1.set_xdata(range(len(scores)))
+                recent_scores = statistics.rolling_scores()
+                line1.set_ydata(recent_scores)
+                line1.set_xdata(range(statistics.episodes - len(recent_scores), statistics.episodes))
                 ax.relim()
                 ax.autoscale_view(True,True,True)
                 plt.draw()
                 plt.pause(0.01)
 
+        statistics.flush()
+
         if verbose:
             plt.ioff()
             plt.show()
 
+        return statistics
 
-    def test_policy(self, game, episodes):
-        scores = []
+
+    def push_priority(self, queue, priorities, state, action, priority, theta):
+        if priority > theta and priority > priorities.get((state, action), 0):
+            priorities[(state, action)] = priority
+            heapq.heappush(queue, (-priority, state, action))
+
+    def prioritized_sweeping_update(self, model, queue, priorities, state, action, reward, next_state, game_over, n_backups, theta):
+        self.state_visits[state] += 1
+        model.update(state, action, reward, next_state, game_over)
+
+        target = reward if game_over else reward + self.gamma * np.max(self.Q[next_state, :])
+        self.Q[state, action] += self.alpha * (target - self.Q[state, action])
+
+        self.push_priority(queue, priorities, state, action, abs(model.backup(self.Q, self.gamma, state, action) - self.Q[state, action]), theta)
+
+        for _ in range(n_backups):
+            if not queue:
+                break
+
+            priority, s, a = heapq.heappop(queue)
+            # stale entry, the pair was pushed again with a higher priority
+            if priorities.get((s, a)) != -priority:
+                continue
+            del priorities[(s, a)]
+
+            self.Q[s, a] = model.backup(self.Q, self.gamma, s, a)
+
+            predecessors = model.predecessors(s)
+            if len(predecessors) == 0:
+                continue
+            V = np.max(self.Q, axis=1)
+            errors = np.abs(model.backups(V, self.gamma, predecessors[:, 0], predecessors[:, 1]) - self.Q[predecessors[:, 0], predecessors[:, 1]])
+            for (ps, pa), error in zip(predecessors, errors):
+                self.push_priority(queue, priorities, int(ps), int(pa), error, theta)
+
+    def prioritized_sweeping_train(self, game, episodes, n_backups=10, theta=0.01, epsilon_start=1.0, epsilon_end=0.001, epsilon_decay=0.995, verbose=False, statistics=None):
+        epsilon = epsilon_start
+        if statistics is None:
+            statistics = TrainingStatistics()
+        model = TransitionModel(self.num_states, self.num_actions)
+        queue = []
+        priorities = {}
 
         for episode in range(episodes):
             game.reset()
+            state, tuple_state = self.get_state(game)
+
+            game_over = False
+            score = 0
+            while not game_over:
+                action = self.choose_action(state, epsilon)
+
+                reward, score, game_over = game.play(action)
+
+                if score > 500:
+                    game_over = True
+
+                next_state, tuple_state = self.get_state(game)
+
+                self.prioritized_sweeping_update(model, queue, priorities, state, action, reward, next_state, game_over and score <= 500, n_backups, theta)
+
+                state = next_state
+
+            print("Episode: " + str(episode) + " Score: " + str(score))
+
+            statistics.record(score, game.frame_count, epsilon)
+
+            if epsilon > epsilon_end:
+                epsilon *= epsilon_decay
+
+        statistics.flush()
+
+        if verbose:
+            self.print_state_visitation_histogram()
+
+        return statistics
+
+    def get_state_visitation_histogram(self):
+        states = {index: state for state, index in self.states_dictionary.items()}
+        return {states[index]: int(self.state_visits[index]) for index in np.argsort(-self.state_visits) if self.state_visits[index] > 0}
+
+    def print_state_visitation_histogram(self, top=20):
+        histogram = self.get_state_visitation_histogram()
+        total = max(int(self.state_visits.sum()), 1)
+
+        print("Visited states: " + str(len(histogram)) + "/" + str(self.num_states) + " Visits: " + str(total))
+        for state, count in list(histogram.items())[:top]:
+            print(str(state) + " " + str(count) + " (" + str(round(100 * count / total, 2)) + "%)")
+
+    def test_policy(self, game, episodes, seed=None, max_score=10000):
+        scores = []
+
+        for episode in range(episodes):
+            # same per-episode seeds as FastForwardRunner.test_policy, so both paths play the same tubes
+            game.reset(seed=None if seed is None else seed + episode)
             state, _ = self.get_state(game)
 
             beats_human_record = False
@@ -224,8 +364,8 @@ class Agent:
 
                 _, score, game_over = game.play(action)
 
-                if score > 10000:
-                    print('episode:', episode, 'score:', score, 'human record reached')
+                if score > max_score:
+                    print('episode:', episode, 'score:', score, 'human record reached' if max_score >= 10000 else 'max score reached')
                     game_over = True
                     beats_human_record = True
 
@@ -239,6 +379,7 @@ class Agent:
                 print("Episode: " + str(episode) + " Score: " + str(score))
 
         print("Average score over " + str(episodes) + " episodes: " + str(np.mean(scores)))
+        return scores
 
 if __name__ == "__main__":
     game = FlappyBirdGameAI()
@@ -0,0 +1,250 @@
+import os
+import sys
+import time
+import argparse
+
+# heavy modules are imported inside the subcommands that use them, keep this file's imports to the standard library
+HEAVY_MODULES = ('pygame', 'matplotlib')
+
+STARTUP_CHECK = """
+import sys, time, json
+start = time.perf_counter()
+import cli
+from agent import Agent
+from fast_forward import FastForwardRunner
+from flappy_bird_game_AI import FlappyBirdGameAI
+FlappyBirdGameAI(headless=True)
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def make_statistics(args):
+    if args.statistics is None:
+        return None
+    from training_statistics import TrainingStatistics
+    return TrainingStatistics(args.statistics, overwrite=args.overwrite_statistics)
+
+
+def make_config(args):
+    from flappy_bird_game_AI import GameConfig
+    return GameConfig(args.width, args.height, args.speed, args.block_size, args.spawn_interval, args.tube_gap, args.distance_bins)
+
+
+def train(args):
+    from agent import Agent
+    from flappy_bird_game_AI import FlappyBirdGameAI
+
+    config = make_config(args)
+    agent = Agent(args.alpha, args.gamma, config)
+    game = FlappyBirdGameAI(headless=True, config=config)
+    schedule = {'epsilon_start': args.epsilon_start, 'epsilon_end': args.epsilon_end, 'epsilon_decay': args.epsilon_decay}
+
+    cache = None
+    source = None
+    if args.cache_dir is not None:
+        from policy_cache import PolicyCache
+        cache = PolicyCache(args.cache_dir)
+        # curriculum warm starts each stage itself, model-based re-solves Q from its own transitions
+        if args.algorithm not in ('curriculum', 'model-based'):
+            source = cache.warm_start(agent)
+            print('warm start from ' + str(None if source is None else tuple(source)))
+
+    if args.algorithm == 'curriculum':
+        from flappy_bird_game_AI import GameConfig
+        from policy_cache import PolicyCache, curriculum_configs, curriculum_train
+        configs = curriculum_configs(GameConfig(), config, args.stages)
+        agent = curriculum_train(cache or PolicyCache('policy_cache'), configs, args.episodes, args.alpha, args.gamma, verbose=True, **schedule)
+    elif args.algorithm == 'td':
+        agent.temporal_difference_train(game, args.episodes, verbose=args.verbose, statistics=make_statistics(args), **schedule)
+    elif args.algorithm == 'sarsa':
+        agent.sarsa_train(game, args.episodes, verbose=args.verbose, statistics=make_statistics(args), **schedule)
+    elif args.algorithm == 'prioritized':
+        agent.prioritized_sweeping_train(game, args.episodes, args.n_backups, args.theta, verbose=args.verbose, statistics=make_statistics(args), **schedule)
+    elif args.algorithm == 'model-based':
+        from model_based_planner import ModelBasedPlanner
+        ModelBasedPlanner(agent).plan(args.iterations, args.transitions, method=args.method, seed=args.seed, verbose=True)
+    elif args.algorithm == 'population':
+        from population_training import PopulationTrainer
+        trainer = PopulationTrainer(args.population_size, train_episodes=args.train_episodes, num_workers=args.workers, seed=args.seed or 0, config=config, initial_Q=agent.Q if source is not None else None)
+        agent.Q = trainer.run(args.generations, verbose=True).Q
+
+    if cache is not None:
+        cache.put(config, agent.Q)
+
+    print('saving policy ' + args.output)
+    agent.save_policy(args.output)
+
+
+def evaluate(args):
+    from agent import Agent
+    from flappy_bird_game_AI import FlappyBirdGameAI
+
+    config = make_config(args)
+    agent = Agent(config=config)
+    agent.load_policy(args.policy)
+    agent.build_policy()
+    game = FlappyBirdGameAI(headless=True, config=config)
+
+    if args.frame_by_frame:
+        agent.test_policy(game, args.episodes, args.seed, args.max_score)
+    else:
+        from fast_forward import FastForwardRunner
+        FastForwardRunner(agent).test_policy(game, args.episodes, args.seed, args.max_score)
+
+
+def play(args):
+    from flappy_bird_game_human import FlappyBirdGame
+
+    address = args.policy_server
+    if address is not None and ':' in address:
+        host, port = address.rsplit(':', 1)
+        address = (host, int(port))
+
+    game = FlappyBirdGame(ai_data_path=args.policy, policy_server_address=address)
+
+    while True:
+        score, game_over = game.play()
+
+        if game_over:
+            print("Score: ", score)
+            break
+
+
+def check_startup(max_seconds):
+    import json
+    import subprocess
+
+    output = subprocess.run([sys.executable, '-c', STARTUP_CHECK], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    print("Startup: " + str(round(result['seconds'] * 1000, 1)) + " ms Heavy modules: " + str(result['heavy']))
+    ok = not result['heavy'] and result['seconds'] <= max_seconds
+    if not ok:
+        print('startup check failed')
+    return ok
+
+
+def benchmark(args):
+    if args.startup:
+        return 0 if check_startup(args.max_startup) else 1
+
+    import numpy as np
+    from agent import Agent
+    from fast_forward import FastForwardRunner
+    from flappy_bird_game_AI import FlappyBirdGameAI
+    from population_simulation import PopulationFlappyBird
+
+    agent = Agent()
+    agent.load_policy(args.policy)
+    agent.build_policy()
+    game = FlappyBirdGameAI(headless=True)
+
+    start = time.perf_counter()
+    frames = 0
+    for episode in range(args.episodes):
+        game.reset(seed=episode)
+        state, _ = agent.get_state(game)
+        game_over = False
+        while not game_over:
+            _, score, game_over = game.play(agent.policy[state])
+            game_over = game_over or score > args.max_score
+            state, _ = agent.get_state(game)
+        frames += game.frame_count
+    elapsed = time.perf_counter() - start
+    print("Frame by frame: " + str(round(frames / elapsed)) + " frames/s")
+
+    runner = FastForwardRunner(agent)
+    start = time.perf_counter()
+    frames = 0
+    for episode in range(args.episodes):
+        frames += runner.run_episode(game, episode, args.max_score)[1]
+    elapsed = time.perf_counter() - start
+    print("Fast forward: " + str(round(frames / elapsed)) + " frames/s")
+
+    simulation = PopulationFlappyBird(args.birds)
+    policies = np.repeat(agent.policy[None].astype(np.int64), args.birds, axis=0)
+    start = time.perf_counter()
+    frames = 0
+    for episode in range(args.episodes):
+        simulation.evaluate(policies, seed=episode, max_score=args.max_score)
+        frames += int(simulation.frames.sum())
+    elapsed = time.perf_counter() - start
+    print("Population of " + str(args.birds) + ": " + str(round(frames / elapsed)) + " bird frames/s")
+    return 0
+
+
+def add_config_arguments(parser):
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=800)
+    parser.add_argument('--speed', type=int, default=20)
+    parser.add_argument('--block-size', type=int, default=10)
+    parser.add_argument('--spawn-interval', type=int, default=50)
+    parser.add_argument('--tube-gap', type=int, default=10, help='in blocks')
+    parser.add_argument('--distance-bins', type=int, default=20)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description='Flappy Bird AI')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = subparsers.add_parser('train')
+    train_parser.add_argument('--algorithm', choices=['td', 'sarsa', 'prioritized', 'model-based', 'population', 'curriculum'], default='td')
+    train_parser.add_argument('--episodes', type=int, default=10000)
+    train_parser.add_argument('--alpha', type=float, default=0.1)
+    train_parser.add_argument('--gamma', type=float, default=0.995)
+    train_parser.add_argument('--epsilon-start', type=float, default=1.0)
+    train_parser.add_argument('--epsilon-end', type=float, default=0.001)
+    train_parser.add_argument('--epsilon-decay', type=float, default=0.995)
+    train_parser.add_argument('--n-backups', type=int, default=10)
+    train_parser.add_argument('--theta', type=float, default=0.01)
+    train_parser.add_argument('--iterations', type=int, default=5)
+    train_parser.add_argument('--transitions', type=int, default=200000)
+    train_parser.add_argument('--method', choices=['value_iteration', 'policy_iteration'], default='value_iteration')
+    train_parser.add_argument('--population-size', type=int, default=32)
+    train_parser.add_argument('--train-episodes', type=int, default=20, help='episodes each individual trains per generation (population)')
+    train_parser.add_argument('--generations', type=int, default=50)
+    train_parser.add_argument('--workers', type=int, default=None)
+    train_parser.add_argument('--seed', type=int, default=None)
+    train_parser.add_argument('--stages', type=int, default=5, help='curriculum steps from the default configuration to the given one')
+    train_parser.add_argument('--cache-dir', default=None, help='policy cache used to warm start and store policies per configuration')
+    train_parser.add_argument('--statistics', default=None, help='binary file for per-episode statistics, appended to if it exists')
+    train_parser.add_argument('--overwrite-statistics', action='store_true', help='start a new statistics file instead of appending')
+    train_parser.add_argument('--output', default='policy.pkl')
+    train_parser.add_argument('--verbose', action='store_true', help='plot scores while training (needs matplotlib)')
+    add_config_arguments(train_parser)
+    train_parser.set_defaults(func=train)
+
+    evaluate_parser = subparsers.add_parser('evaluate')
+    evaluate_parser.add_argument('--policy', default='td_policy.pkl')
+    evaluate_parser.add_argument('--episodes', type=int, default=50)
+    evaluate_parser.add_argument('--max-score', type=int, default=10000)
+    evaluate_parser.add_argument('--seed', type=int, default=None)
+    evaluate_parser.add_argument('--frame-by-frame', action='store_true')
+    add_config_arguments(evaluate_parser)
+    evaluate_parser.set_defaults(func=evaluate)
+
+    play_parser = subparsers.add_parser('play')
+    play_parser.add_argument('--policy', default='td_policy.pkl')
+    play_parser.add_argument('--policy-server', default=None, help='unix socket path or host:port')
+    play_parser.set_defaults(func=play)
+
+    benchmark_parser = subparsers.add_parser('benchmark')
+    benchmark_parser.add_argument('--policy', default='td_policy.pkl')
+    benchmark_parser.add_argument('--episodes', type=int, default=5)
+    benchmark_parser.add_argument('--max-score', type=int, default=500)
+    benchmark_parser.add_argument('--birds', type=int, default=256)
+    benchmark_parser.add_argument('--startup', action='store_true', help='check import time and that no heavy module is loaded')
+    benchmark_parser.add_argument('--max-startup', type=float, default=1.0)
+    benchmark_parser.set_defaults(func=benchmark)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import bisect
+import numpy as np
+from flappy_bird_game_AI import Action
+
+NO_EVENT = 1 << 30
+
+
+class FastForwardRunner:
+    def __init__(self, agent, policy=None):
+        self.agent = agent
+        self.policy = np.asarray(agent.policy if policy is None else policy).astype(np.int64).tolist()
+        self.distance_bins = None
+        self.distance_bins_width = None
+
+    def get_state(self, bird_y, next_tube_dx, next_tube_y, h):
+        # scalar Agent.get_state on raw positions, bisect_right matches np.digitize
+        config = self.agent.config
+        gap = config.tube_gap * config.block_size // 2
+
+        if bird_y < 2 * config.block_size:
+            bird_collision_case = 1
+        elif bird_y > h - 2 * config.block_size:
+            bird_collision_case = 2
+        else:
+            bird_collision_case = 0
+
+        difference = bird_y - next_tube_y
+        if difference >= 0:
+            bird_tube_height_case = 0 if difference <= gap else 1
+        else:
+            bird_tube_height_case = 2 if -difference <= gap else 3
+
+        next_tube_distance_class = bisect.bisect_right(self.distance_bins, next_tube_dx)
+
+        return (bird_collision_case * 4 + bird_tube_height_case) * self.agent.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR + next_tube_distance_class
+
+    def get_game_state(self, game):
+        if self.distance_bins_width != game.w:
+            self.distance_bins = np.linspace(0, game.w, self.agent.NEXT_TUBE_DISTANCE_DISCRETIZATION_FACTOR).tolist()
+            self.distance_bins_width = game.w
+
+        next_tube_x, next_tube_y = game.w, game.h // 2
+        if len(game.tubes) > 0:
+            next_tube_x = game.tubes[0].x
+            next_tube_y = game.tubes[0].y
+
+        return self.get_state(game.bird.y, next_tube_x - game.bird.x, next_tube_y, game.h)
+
+    def bird_velocity(self, game, action):
+        # per-frame dy and for how many frames it stays constant
+        block_size = game.config.block_size
+        if action == Action.JUMP.value:
+            return -2 * block_size, NO_EVENT
+        if action == Action.DIVE.value:
+            return 2 * block_size, NO_EVENT
+
+        if game.rise_timer - 1 > 0:
+            return -block_size, game.rise_timer - 1
+        if game.fall_timer - 1 > 0:
+            return block_size, game.fall_timer - 1
+        return block_size // 2, NO_EVENT
+
+    def segment_length(self, game, action):
+        block_size = game.config.block_size
+        speed = game.config.speed
+        velocity, frames = self.bird_velocity(game, action)
+
+        # the spawn frame is played normally
+        frames = min(frames, game.config.spawn_interval - 1 - game.tube_timer)
+
+        if len(game.tubes) > 0:
+            closest_x = game.tubes[0].x
+
+            # no tube removal, i.e. no score change and no new tubes[0]
+            frames = min(frames, closest_x // speed)
+
+            # tubes[0] stays out of the check_collision window [bird.x - 3 * block_size, bird.x + block_size]
+            if closest_x >= game.bird.x - 3 * block_size:
+                frames = min(frames, max((closest_x - (game.bird.x + block_size) - 1) // speed + 1, 0))
+
+            # walls are only checked while a tube exists
+            if velocity < 0:
+                frames = min(frames, game.bird.y // -velocity)
+            else:
+                frames = min(frames, (game.h - block_size - game.bird.y) // velocity)
+
+        if frames <= 1:
+            return frames
+
+        # the action picked after frames 1..frames-1 has to stay the same
+        if len(game.tubes) > 0:
+            next_tube_dx = game.tubes[0].x - game.bird.x
+            next_tube_y = game.tubes[0].y
+            tube_speed = speed
+        else:
+            next_tube_dx = game.w - game.bird.x
+            next_tube_y = game.h // 2
+            tube_speed = 0
+
+        for t in range(1, frames):
+            state = self.get_state(game.bird.y + velocity * t, next_tube_dx - tube_speed * t, next_tube_y, game.h)
+            if self.policy[state] != action:
+                return t
+
+        return frames
+
+    def skip(self, game, action, frames):
+        speed = game.config.speed
+        velocity, _ = self.bird_velocity(game, action)
+
+        game.frame_count += frames
+        game.tube_timer += frames
+
+        if action == Action.JUMP.value:
+            game.rise_timer = 6
+            game.fall_timer = 0
+        elif action == Action.DIVE.value:
+            game.fall_timer = 6
+            game.rise_timer = 0
+        else:
+            game.rise_timer -= frames
+            game.fall_timer -= frames
+
+        game.bird = game.bird._replace(y=game.bird.y + velocity * frames)
+        for i, tube in enumerate(game.tubes):
+            game.tubes[i] = tube._replace(x=tube.x - speed * frames)
+
+    def run_episode(self, game, seed=None, max_score=10000):
+        game.reset(seed=seed)
+
+        steps = 0
+        score = 0
+        game_over = False
+        while not game_over:
+            action = self.policy[self.get_game_state(game)]
+
+            frames = self.segment_length(game, action)
+            if frames > 1:
+                self.skip(game, action, frames)
+            else:
+                _, score, game_over = game.play(action)
+
+            steps += 1
+
+            if score > max_score:
+                game_over = True
+
+        return score, game.frame_count, steps
+
+    def test_policy(self, game, episodes, seed=None, max_score=10000):
+        scores = []
+
+        for episode in range(episodes):
+            score, frames, steps = self.run_episode(game, None if seed is None else seed + episode, max_score)
+            scores.append(score)
+            print("Episode: " + str(episode) + " Score: " + str(score) + " Frames: " + str(frames) + " Steps: " + str(steps))
+
+        print("Average score over " + str(episodes) + " episodes: " + str(np.mean(scores)))
+        return scores
@@ -0,0 +1,269 @@
+import time
+import multiprocessing as mp
+import numpy as np
+from flappy_bird_game_AI import FlappyBirdGameAI
+from agent import Agent
+
+try:
+    import gymnasium
+    from gymnasium.spaces import Box, Discrete
+    Env = gymnasium.Env
+except ImportError:
+    # same constructor signatures as gymnasium.spaces, enough for the wrapper to work without it
+    class Discrete:
+        def __init__(self, n):
+            self.n = n
+            self.shape = ()
+            self.dtype = np.int64
+
+        def sample(self):
+            return int(np.random.choice(self.n))
+
+        def contains(self, x):
+            return 0 <= int(x) < self.n
+
+    class Box:
+        def __init__(self, low, high, shape=None, dtype=np.float32):
+            self.shape = tuple(shape) if shape is not None else np.shape(low)
+            self.dtype = dtype
+            self.low = np.broadcast_to(np.asarray(low, dtype=dtype), self.shape)
+            self.high = np.broadcast_to(np.asarray(high, dtype=dtype), self.shape)
+
+        def sample(self):
+            return np.random.uniform(self.low, self.high).astype(self.dtype)
+
+        def contains(self, x):
+            x = np.asarray(x)
+            return x.shape == self.shape and np.all(x >= self.low) and np.all(x <= self.high)
+
+    class Env:
+        pass
+
+
+# bird_y, rise_timer, fall_timer, tube_timer, next_tube_dx, next_tube_y
+OBSERVATION_SIZE = 6
+
+
+class FlappyBirdEnv(Env):
+    metadata = {'render_modes': []}
+
+    def __init__(self, observation_type='vector', max_score=500, w=1280, h=800, config=None):
+        self.observation_type = observation_type
+        self.max_score = max_score
+        self.game = FlappyBirdGameAI(w, h, headless=True, config=config)
+        self.agent = Agent(config=self.game.config)
+        w, h = self.game.w, self.game.h
+
+        self.action_space = Discrete(Agent.num_actions)
+        if observation_type == 'vector':
+            self.observation_space = Box(
+                low=np.array([-h, 0, 0, 0, -w, 0], dtype=np.float32),
+                high=np.array([2 * h, 6, 6, self.game.config.spawn_interval, w, h], dtype=np.float32),
+                dtype=np.float32,
+            )
+        elif observation_type == 'state':
+            self.observation_space = Discrete(self.agent.num_states)
+        else:
+            raise ValueError("observation_type must be 'vector' or 'state', got " + repr(observation_type))
+
+    def get_observation(self):
+        if self.observation_type == 'state':
+            state, _ = self.agent.get_state(self.game)
+            return state
+
+        game = self.game
+        next_tube_x, next_tube_y = game.w, game.h // 2
+        if len(game.tubes) > 0:
+            next_tube_x = game.tubes[0].x
+            next_tube_y = game.tubes[0].y
+
+        return np.array([
+            game.bird.y,
+            max(game.rise_timer, 0),
+            max(game.fall_timer, 0),
+            game.tube_timer,
+            next_tube_x - game.bird.x,
+            next_tube_y,
+        ], dtype=np.float32)
+
+    def reset(self, seed=None, options=None):
+        self.game.reset(seed=seed)
+        return self.get_observation(), {'score': 0}
+
+    def step(self, action):
+        reward, score, game_over = self.game.play(int(action))
+        truncated = not game_over and score > self.max_score
+        return self.get_observation(), float(reward), game_over, truncated, {'score': score}
+
+    def close(self):
+        pass
+
+
+RESET = 0
+STEP = 1
+CLOSE = 2
+
+
+def _shared_array(ctx, typecode, shape, dtype):
+    raw = ctx.RawArray(typecode, int(np.prod(shape)))
+    return raw, np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+
+def _worker(env_indices, env_kwargs, buffers, start, done, command):
+    observations, final_observations, actions, rewards, terminated, truncated, scores, seeds = [
+        np.frombuffer(raw, dtype=dtype).reshape(shape) for raw, dtype, shape in buffers
+    ]
+    envs = {i: FlappyBirdEnv(**env_kwargs) for i in env_indices}
+    parent = mp.parent_process()
+
+    while True:
+        if not start.acquire(timeout=1.0):
+            # nobody is left to send commands if the main process was killed
+            if parent is not None and not parent.is_alive():
+                break
+            continue
+        cmd = command.value
+
+        if cmd == CLOSE:
+            done.release()
+            break
+
+        for i, env in envs.items():
+            if cmd == RESET:
+                seed = int(seeds[i])
+                observation, _ = env.reset(seed=seed if seed >= 0 else None)
+                rewards[i] = 0
+                terminated[i] = truncated[i] = False
+                scores[i] = 0
+            else:
+                observation, reward, term, trunc, info = env.step(actions[i])
+                rewards[i] = reward
+                terminated[i] = term
+                truncated[i] = trunc
+                scores[i] = info['score']
+                # autoreset: the score and last observation of the finished episode stay until the next step
+                if term or trunc:
+                    final_observations[i] = observation
+                    observation, _ = env.reset()
+
+            observations[i] = observation
+
+        done.release()
+
+
+class SharedMemoryVectorEnv:
+    def __init__(self, num_envs, num_workers=None, observation_type='vector', max_score=500, context=None, config=None, timeout=60.0):
+        ctx = mp.get_context(context)
+        self.num_envs = num_envs
+        self.timeout = timeout
+        self.num_workers = min(num_workers or mp.cpu_count(), num_envs)
+
+        self.single_env = FlappyBirdEnv(observation_type, max_score, config=config)
+        self.single_action_space = self.single_env.action_space
+        self.single_observation_space = self.single_env.observation_space
+
+        if observation_type == 'vector':
+            observation_spec = ('f', (num_envs, OBSERVATION_SIZE), np.float32)
+        else:
+            observation_spec = ('q', (num_envs,), np.int64)
+
+        specs = [
+            observation_spec,
+            observation_spec,
+            ('q', (num_envs,), np.int64),
+            ('f', (num_envs,), np.float32),
+            ('b', (num_envs,), np.bool_),
+            ('b', (num_envs,), np.bool_),
+            ('q', (num_envs,), np.int64),
+            ('q', (num_envs,), np.int64),
+        ]
+        buffers = []
+        arrays = []
+        for typecode, shape, dtype in specs:
+            raw, array = _shared_array(ctx, typecode, shape, dtype)
+            buffers.append((raw, dtype, shape))
+            arrays.append(array)
+        self.observations, self.final_observations, self.actions, self.rewards, self.terminated, self.truncated, self.scores, self.seeds = arrays
+
+        self.command = ctx.RawValue('i', RESET)
+        # one start/done semaphore pair per worker, a killed worker can't leave a shared lock held like a Barrier can
+        self.start = [ctx.Semaphore(0) for _ in range(self.num_workers)]
+        self.done = [ctx.Semaphore(0) for _ in range(self.num_workers)]
+        env_kwargs = {'observation_type': observation_type, 'max_score': max_score, 'config': config}
+
+        self.workers = []
+        for env_indices, start, done in zip(np.array_split(np.arange(num_envs), self.num_workers), self.start, self.done):
+            worker = ctx.Process(target=_worker, args=(env_indices.tolist(), env_kwargs, buffers, start, done, self.command), daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+        self.closed = False
+
+    def _signal(self, cmd):
+        self.command.value = cmd
+        for start in self.start:
+            start.release()
+
+    def _wait(self):
+        deadline = time.monotonic() + self.timeout
+        for worker, done in zip(self.workers, self.done):
+            while not done.acquire(timeout=0.1):
+                if not worker.is_alive():
+                    self.terminate()
+                    raise RuntimeError('vector env worker ' + str(worker.pid) + ' died with exit code ' + str(worker.exitcode))
+                if time.monotonic() > deadline:
+                    self.terminate()
+                    raise RuntimeError('vector env worker ' + str(worker.pid) + ' did not respond within ' + str(self.timeout) + ' s')
+
+    def terminate(self):
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self.closed = True
+
+    def _run(self, cmd):
+        self._signal(cmd)
+        self._wait()
+
+    def reset(self, seed=None, options=None):
+        if seed is None:
+            self.seeds[:] = -1
+        elif np.ndim(seed) == 0:
+            self.seeds[:] = seed + np.arange(self.num_envs)
+        else:
+            self.seeds[:] = seed
+
+        self._run(RESET)
+        return self.observations.copy(), {'score': self.scores.copy()}
+
+    def step_async(self, actions):
+        self.actions[:] = actions
+        self._signal(STEP)
+
+    def step_wait(self):
+        self._wait()
+        # observations of finished envs already start the next episode, the last one is kept for bootstrapping truncated episodes
+        info = {'score': self.scores.copy(), 'final_observation': self.final_observations.copy(), '_final_observation': self.terminated | self.truncated}
+        return (self.observations.copy(), self.rewards.copy(), self.terminated.copy(),
+                self.truncated.copy(), info)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        self._signal(CLOSE)
+        try:
+            self._wait()
+        except RuntimeError:
+            return
+        self.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
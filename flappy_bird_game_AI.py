@@ -1,10 +1,19 @@
-import pygame
 import random
 from enum import Enum
 from collections import namedtuple
 
-pygame.init()
-font = pygame.font.SysFont('arial.ttf', 25)
+# pygame is only loaded by games that need a window, headless jobs never import it
+pygame = None
+font = None
+
+def init_pygame():
+    global pygame, font
+    if pygame is None:
+        import pygame as pygame_module
+        pygame = pygame_module
+        pygame.init()
+        font = pygame.font.SysFont('arial.ttf', 25)
+    return pygame
 
 class Action(Enum):
     NOTHING = 0
@@ -28,19 +37,32 @@ BLOCK_SIZE = 10
 DETAILED_BLOCK_SIZE = 5
 SPEED = 20
 
+# tube_gap is in blocks, spawn_interval in frames, distance_bins is the Agent's next tube distance discretization
+GameConfig = namedtuple('GameConfig', 'w, h, speed, block_size, spawn_interval, tube_gap, distance_bins', defaults=(1280, 800, SPEED, BLOCK_SIZE, 50, 10, 20))
+
 class FlappyBirdGameAI:
 
-    def __init__(self, w=1280, h=800):
-        self.w = w
-        self.h = h
-        #self.display = pygame.display.set_mode((self.w, self.h))
-        pygame.display.set_caption('Flappy Bird')
+    def __init__(self, w=1280, h=800, headless=False, config=None):
+        if config is None:
+            config = GameConfig(w=w, h=h)
+        self.config = config
+        self.w = config.w
+        self.h = config.h
+        self.headless = headless
+        if not headless:
+            init_pygame()
+            #self.display = pygame.display.set_mode((self.w, self.h))
+            pygame.display.set_caption('Flappy Bird')
         #self.clock = pygame.time.Clock()
+        self.random = random.Random()
 
         self.reset()
         
 
-    def reset(self):
+    def reset(self, seed=None):
+        if seed is not None:
+            self.random.seed(seed)
+
         self.bird = Point(50, self.h // 2)
         self.score = 0
         self.tubes = []
@@ -51,12 +73,14 @@ class FlappyBirdGameAI:
 
 
     def spaw_tube(self):
-        tube = Point(self.w, random.randint(BLOCK_SIZE * 4, self.h - 4 * BLOCK_SIZE))
+        block_size = self.config.block_size
+        tube = Point(self.w, self.random.randint(block_size * 4, self.h - 4 * block_size))
         self.tubes.append(tube)
  
     def move_tubes(self):
+        speed = self.config.speed
         for i, tube in enumerate(self.tubes):
-            self.tubes[i] = tube._replace(x=tube.x - SPEED)
+            self.tubes[i] = tube._replace(x=tube.x - speed)
 
     def remove_passed_tubes(self):
         counter = 0
@@ -71,23 +95,25 @@ class FlappyBirdGameAI:
 
 
     def draw_tubes(self):
+        block_size = self.config.block_size
+        gap = self.config.tube_gap * block_size // 2
         for tube in self.tubes:
-            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x, 0, BLOCK_SIZE // 2, tube.y - BLOCK_SIZE * 5))
-            pygame.draw.rect(self.display, GREEN, (tube.x + BLOCK_SIZE // 2, 0, BLOCK_SIZE * 2, tube.y - BLOCK_SIZE * 5))
-            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + BLOCK_SIZE * 2.5, 0, BLOCK_SIZE // 2, tube.y - BLOCK_SIZE * 5))
+            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x, 0, block_size // 2, tube.y - gap))
+            pygame.draw.rect(self.display, GREEN, (tube.x + block_size // 2, 0, block_size * 2, tube.y - gap))
+            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + block_size * 2.5, 0, block_size // 2, tube.y - gap))
 
-            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x - BLOCK_SIZE // 2, tube.y - BLOCK_SIZE * 5, BLOCK_SIZE // 2, BLOCK_SIZE))
-            pygame.draw.rect(self.display, GREEN, (tube.x, tube.y - BLOCK_SIZE * 5, BLOCK_SIZE * 3, BLOCK_SIZE))
-            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + BLOCK_SIZE * 3, tube.y - BLOCK_SIZE * 5, BLOCK_SIZE // 2, BLOCK_SIZE))
+            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x - block_size // 2, tube.y - gap, block_size // 2, block_size))
+            pygame.draw.rect(self.display, GREEN, (tube.x, tube.y - gap, block_size * 3, block_size))
+            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + block_size * 3, tube.y - gap, block_size // 2, block_size))
 
 
-            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x - BLOCK_SIZE // 2, tube.y + BLOCK_SIZE * 5, BLOCK_SIZE // 2, BLOCK_SIZE))
-            pygame.draw.rect(self.display, GREEN, (tube.x, tube.y + BLOCK_SIZE * 5, BLOCK_SIZE * 3, BLOCK_SIZE))
-            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + BLOCK_SIZE * 3, tube.y + BLOCK_SIZE * 5, BLOCK_SIZE // 2, BLOCK_SIZE))
+            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x - block_size // 2, tube.y + gap, block_size // 2, block_size))
+            pygame.draw.rect(self.display, GREEN, (tube.x, tube.y + gap, block_size * 3, block_size))
+            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + block_size * 3, tube.y + gap, block_size // 2, block_size))
 
-            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x, tube.y + BLOCK_SIZE * 6, BLOCK_SIZE // 2, self.h))
-            pygame.draw.rect(self.display, GREEN, (tube.x + BLOCK_SIZE // 2, tube.y + BLOCK_SIZE * 6, BLOCK_SIZE * 2, self.h))
-            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + BLOCK_SIZE * 2.5, tube.y + BLOCK_SIZE * 6, BLOCK_SIZE // 2, self.h))
+            pygame.draw.rect(self.display, LIGHT_GREEN, (tube.x, tube.y + gap + block_size, block_size // 2, self.h))
+            pygame.draw.rect(self.display, GREEN, (tube.x + block_size // 2, tube.y + gap + block_size, block_size * 2, self.h))
+            pygame.draw.rect(self.display, DARK_GREEN, (tube.x + block_size * 2.5, tube.y + gap + block_size, block_size // 2, self.h))
 
     def draw_bird(self, mode="simple"):
         if mode == "simple":
@@ -159,40 +185,44 @@ class FlappyBirdGameAI:
 
 
     def check_collision(self):
+        block_size = self.config.block_size
+        gap = self.config.tube_gap * block_size // 2
+
         if len(self.tubes) == 0:
             return False
         
         closest_tube = self.tubes[0]
 
-        if self.bird.x + BLOCK_SIZE >= closest_tube.x and self.bird.x <= closest_tube.x + BLOCK_SIZE * 3:
-            if self.bird.y <= closest_tube.y - BLOCK_SIZE * 5 or self.bird.y + BLOCK_SIZE >= closest_tube.y + BLOCK_SIZE * 5:
+        if self.bird.x + block_size >= closest_tube.x and self.bird.x <= closest_tube.x + block_size * 3:
+            if self.bird.y <= closest_tube.y - gap or self.bird.y + block_size >= closest_tube.y + gap:
                 return True
 
-        if not 0 <= self.bird.y <= self.h - BLOCK_SIZE:
+        if not 0 <= self.bird.y <= self.h - block_size:
             return True
 
         return False
     
     def _move_bird(self, action):
+        block_size = self.config.block_size
         #print("ACTION" + str(action))
         if action == Action.JUMP.value:
             #print("JUMP")
-            self.bird = self.bird._replace(y= self.bird.y - BLOCK_SIZE)
+            self.bird = self.bird._replace(y= self.bird.y - block_size)
             self.rise_timer = 6
             self.fall_timer = 0
         elif action == Action.DIVE.value:
             #print("DIVE")
-            self.bird = self.bird._replace(y= self.bird.y + BLOCK_SIZE)
+            self.bird = self.bird._replace(y= self.bird.y + block_size)
             self.fall_timer = 6
             self.rise_timer = 0
 
         #print("NO ACTION")
         if self.rise_timer > 0:
-            self.bird = self.bird._replace(y= self.bird.y - BLOCK_SIZE)
+            self.bird = self.bird._replace(y= self.bird.y - block_size)
         elif self.fall_timer > 0:
-            self.bird = self.bird._replace(y= self.bird.y + BLOCK_SIZE)
+            self.bird = self.bird._replace(y= self.bird.y + block_size)
         else:
-            self.bird = self.bird._replace(y= self.bird.y + BLOCK_SIZE // 2)
+            self.bird = self.bird._replace(y= self.bird.y + block_size // 2)
 
     def play(self, action):
         self.frame_count += 1
@@ -200,14 +230,15 @@ class FlappyBirdGameAI:
         self.rise_timer -= 1
         self.fall_timer -= 1
 
-        if self.tube_timer == 50:
+        if self.tube_timer == self.config.spawn_interval:
             self.spaw_tube()
             self.tube_timer = 0
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                quit()
+        if not self.headless:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    quit()
 
         self._move_bird(action)
 
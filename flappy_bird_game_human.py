@@ -122,13 +122,24 @@ class Game:
         self.tubes = tubes
 
 class AIControlManager(InstantUsePowerUpManager):
-    def __init__(self, w, h, probability, bird, image_path, effect_duration, tubes, ai_data_path=AI_DATA_PATH):
+    def __init__(self, w, h, probability, bird, image_path, effect_duration, tubes, ai_data_path=AI_DATA_PATH, policy_server_address=None):
         super().__init__(w, h, probability, bird, image_path, effect_duration)
         self.agent = Agent()
-        self.agent.load_policy(ai_data_path)
-        self.agent.build_policy()
+        self.client = None
+        if policy_server_address is not None:
+            from policy_server import PolicyClient
+            self.client = PolicyClient(policy_server_address)
+        else:
+            self.agent.load_policy(ai_data_path)
+            self.agent.build_policy()
         self.game = Game(bird, w, h, tubes)
 
+    def get_action(self):
+        state, _ = self.agent.get_state(self.game)
+        if self.client is not None:
+            return int(self.client.get_actions([state])[0])
+        return self.agent.policy[state]
+
     def handle_game_step(self, bird, tubes):
         self.game.bird = bird
         self.game.tubes = tubes
@@ -140,7 +151,7 @@ class BombsManager(StackablePowerUpManager):
 
 
 class FlappyBirdGame:
-    def __init__(self, w=1280, h=800):
+    def __init__(self, w=1280, h=800, ai_data_path=AI_DATA_PATH, policy_server_address=None):
         self.w = w
         self.h = h
         self.display = pygame.display.set_mode((self.w, self.h))
@@ -158,7 +169,7 @@ class FlappyBirdGame:
         self.font = pygame.font.Font(None, 36)
 
         self.bombs_manager = BombsManager(self.w, self.h, 0.005, self.bird, 'bomb_image.png')
-        self.ai_manager = AIControlManager(self.w, self.h, 0.005, self.bird, 'brain_image2.png', 9000, self.tubes)
+        self.ai_manager = AIControlManager(self.w, self.h, 0.005, self.bird, 'brain_image2.png', 9000, self.tubes, ai_data_path, policy_server_address)
 
     def destroy_tube(self):
         if self.bombs_manager.inventory > 0 and self.tubes:
@@ -357,8 +368,7 @@ class FlappyBirdGame:
             else:
                 self.bird = self.bird._replace(y= self.bird.y + BLOCK_SIZE // 2)
         else:
-            state, _ = self.ai_manager.agent.get_state(self.ai_manager.game)
-            action = self.ai_manager.agent.policy[state]
+            action = self.ai_manager.get_action()
             self._move_bird(action)
 
         game_over = False
@@ -379,6 +389,7 @@ class FlappyBirdGame:
             mode = "down"
 
         self._update_ui(mode=mode)
+        pygame.display.update()
 
         if self.ai_manager.effect_time > 0:
             self.clock.tick(SPEED * 3)
@@ -396,6 +407,4 @@ if __name__ == '__main__':
 
         if game_over:
             print("Score: ", score)
-            break
-
-        pygame.display.update()
\ No newline at end of file
+            break
\ No newline at end of file
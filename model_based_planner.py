@@ -0,0 +1,113 @@
+import numpy as np
+from flappy_bird_game_AI import FlappyBirdGameAI
+from agent import Agent
+from population_simulation import PopulationFlappyBird
+from fast_forward import FastForwardRunner
+from transition_model import TransitionModel
+
+
+class ModelBasedPlanner:
+    def __init__(self, agent, num_birds=256):
+        self.agent = agent
+        self.model = TransitionModel(agent.num_states, agent.num_actions)
+        self.simulation = PopulationFlappyBird(num_birds, config=agent.config)
+        self.rounds = 0
+
+    def collect(self, num_transitions, epsilon=0.1, max_frames=5000, seed=None):
+        simulation = self.simulation
+        policy = np.argmax(self.agent.Q, axis=1)
+        collected = 0
+
+        while collected < num_transitions:
+            simulation.reset(None if seed is None else seed + self.rounds)
+            self.rounds += 1
+
+            states = simulation.get_states()
+            frames = 0
+            while simulation.alive.any() and frames < max_frames and collected < num_transitions:
+                explore = np.random.uniform(0, 1, simulation.num_birds) < epsilon
+                actions = np.where(explore, np.random.randint(0, Agent.num_actions, simulation.num_birds), policy[states])
+
+                alive = simulation.alive.copy()
+                rewards, _, died = simulation.play(actions)
+                next_states = simulation.get_states()
+
+                self.model.update_batch(states[alive], actions[alive], rewards[alive], next_states[alive], died[alive])
+                collected += int(alive.sum())
+
+                states = next_states
+                frames += 1
+
+        return collected
+
+    def value_iteration(self, gamma, tolerance=1e-6, max_iterations=100000):
+        P = self.model.transition_probabilities()
+        R = self.model.expected_rewards()
+        Q = self.agent.Q.copy()
+
+        for _ in range(max_iterations):
+            new_Q = R + gamma * P @ np.max(Q, axis=1)
+            delta = np.max(np.abs(new_Q - Q))
+            Q = new_Q
+            if delta < tolerance:
+                break
+
+        return Q
+
+    def policy_iteration(self, gamma, max_iterations=1000):
+        P = self.model.transition_probabilities()
+        R = self.model.expected_rewards()
+        states = np.arange(self.agent.num_states)
+        policy = np.argmax(self.agent.Q, axis=1)
+
+        for _ in range(max_iterations):
+            P_policy = P[states, policy]
+            R_policy = R[states, policy]
+            V = np.linalg.solve(np.eye(self.agent.num_states) - gamma * P_policy, R_policy)
+
+            Q = R + gamma * P @ V
+            # keep the current action on ties so the loop terminates
+            new_policy = np.where(Q[states, policy] >= np.max(Q, axis=1), policy, np.argmax(Q, axis=1))
+            if np.array_equal(new_policy, policy):
+                break
+            policy = new_policy
+
+        return Q
+
+    def solve(self, method='value_iteration'):
+        if method == 'value_iteration':
+            Q = self.value_iteration(self.agent.gamma)
+        elif method == 'policy_iteration':
+            Q = self.policy_iteration(self.agent.gamma)
+        else:
+            raise ValueError("method must be 'value_iteration' or 'policy_iteration', got " + repr(method))
+
+        self.agent.Q = Q
+        self.agent.build_policy()
+        return Q
+
+    def plan(self, iterations=5, transitions_per_iteration=200000, epsilon=0.1, method='value_iteration', seed=None, verbose=False):
+        for iteration in range(iterations):
+            # first round explores uniformly, later rounds follow the current plan
+            collected = self.collect(transitions_per_iteration, 1.0 if iteration == 0 else epsilon, seed=seed)
+            self.solve(method)
+
+            if verbose:
+                visited = int(np.count_nonzero(self.model.visits.sum(axis=1)))
+                print("Iteration: " + str(iteration) + " Transitions: " + str(collected) + " Visited states: " + str(visited))
+
+        return self.agent.Q
+
+
+if __name__ == "__main__":
+    agent = Agent()
+    planner = ModelBasedPlanner(agent)
+
+    print('planning')
+    planner.plan(verbose=True)
+
+    print('saving policy')
+    agent.save_policy('model_based_policy.pkl')
+
+    print('testing')
+    FastForwardRunner(agent).test_policy(FlappyBirdGameAI(headless=True, config=agent.config), 10)
@@ -0,0 +1,274 @@
+import os
+import json
+import numpy as np
+from flappy_bird_game_AI import FlappyBirdGameAI, GameConfig, WHITE, RED, BLACK, BLUE, GREEN, LIGHT_GREEN, DARK_GREEN, ORANGE, BROWN, DETAILED_BLOCK_SIZE
+
+
+def to_gray(color):
+    r, g, b = color
+    return int(round(0.299 * r + 0.587 * g + 0.114 * b))
+
+
+# (dx, dy, width, height, color) in DETAILED_BLOCK_SIZE units, same rectangles as FlappyBirdGameAI.draw_bird
+BIRD_SPRITES = {
+    "simple": [
+        (0, -1, 3, 1, ORANGE),
+        (0, 0, 1, 1, ORANGE), (1, 0, 1, 1, WHITE), (2, 0, 1, 1, BLACK),
+        (-2, 1, 5, 1, ORANGE), (3, 1, 1, 1, RED),
+        (-3, 2, 6, 1, ORANGE),
+        (-2, 3, 4, 1, ORANGE),
+        (-1, 4, 2, 1, ORANGE),
+    ],
+    "up": [
+        (0, -1, 3, 1, ORANGE), (-3, -1, 1, 1, BROWN),
+        (0, 0, 1, 1, ORANGE), (1, 0, 1, 1, WHITE), (2, 0, 1, 1, BLACK), (-3, 0, 1, 1, BROWN),
+        (-3, 1, 2, 1, BROWN), (0, 1, 3, 1, ORANGE), (3, 1, 1, 1, RED),
+        (-3, 2, 3, 1, BROWN), (0, 2, 3, 1, ORANGE),
+        (-2, 3, 2, 1, BROWN), (0, 3, 2, 1, ORANGE),
+        (-1, 4, 2, 1, ORANGE),
+    ],
+    "down": [
+        (-3, -1, 1, 1, BROWN),
+        (-3, 0, 2, 1, BROWN),
+        (-2, 1, 2, 1, BROWN),
+        (-2, 2, 2, 1, BROWN), (0, 2, 3, 1, ORANGE),
+        (-2, 3, 3, 1, ORANGE), (1, 3, 1, 1, WHITE), (2, 3, 1, 1, BLACK),
+        (-1, 4, 4, 1, ORANGE), (3, 4, 1, 1, RED),
+    ],
+}
+
+
+class OffscreenRenderer:
+    def __init__(self, w=1280, h=800, scale=8, config=None):
+        if config is None:
+            config = GameConfig(w=w, h=h)
+        self.config = config
+        self.w = config.w
+        self.h = config.h
+        self.scale = scale
+        self.frame_shape = (self.h // scale, self.w // scale)
+        # drawn at full resolution and block averaged, so strips narrower than a cell don't flicker with their position
+        self.canvas = np.empty((self.frame_shape[0] * scale, self.frame_shape[1] * scale), dtype=np.uint8)
+        self.background = to_gray(BLUE)
+        self.bird_sprites = {
+            mode: [(dx * DETAILED_BLOCK_SIZE, dy * DETAILED_BLOCK_SIZE, width * DETAILED_BLOCK_SIZE, height * DETAILED_BLOCK_SIZE, to_gray(color))
+                   for dx, dy, width, height, color in rects]
+            for mode, rects in BIRD_SPRITES.items()
+        }
+        self.light_green = to_gray(LIGHT_GREEN)
+        self.green = to_gray(GREEN)
+        self.dark_green = to_gray(DARK_GREEN)
+
+    def fill_rect(self, canvas, x, y, width, height, value):
+        # pixel rectangle, clipped to the canvas
+        x0 = max(int(np.floor(x)), 0)
+        y0 = max(int(np.floor(y)), 0)
+        x1 = min(int(np.floor(x + width)), canvas.shape[1])
+        y1 = min(int(np.floor(y + height)), canvas.shape[0])
+        if x1 > x0 and y1 > y0:
+            canvas[y0:y1, x0:x1] = value
+
+    def downscale(self, canvas, frame):
+        if self.scale == 1:
+            frame[:] = canvas
+            return
+        rows, columns = self.frame_shape
+        area = self.scale * self.scale
+        dtype = np.uint16 if area * 255 < 2 ** 16 else np.uint32
+        # rows first then columns, much faster than one sum over axes (1, 3)
+        cells = canvas.reshape(rows, self.scale, -1).sum(axis=1, dtype=dtype).reshape(rows, columns, self.scale).sum(axis=2, dtype=dtype)
+        # rounded mean of each scale x scale cell
+        frame[:] = (cells + area // 2) // area
+
+    def draw_tubes(self, canvas, tubes):
+        block_size = self.config.block_size
+        half = block_size // 2
+        gap = self.config.tube_gap * block_size // 2
+        for tube in tubes:
+            top = tube.y - gap
+            bottom = tube.y + gap
+
+            self.fill_rect(canvas, tube.x, 0, half, top, self.light_green)
+            self.fill_rect(canvas, tube.x + half, 0, block_size * 2, top, self.green)
+            self.fill_rect(canvas, tube.x + block_size * 2.5, 0, half, top, self.dark_green)
+
+            self.fill_rect(canvas, tube.x - half, top, half, block_size, self.light_green)
+            self.fill_rect(canvas, tube.x, top, block_size * 3, block_size, self.green)
+            self.fill_rect(canvas, tube.x + block_size * 3, top, half, block_size, self.dark_green)
+
+            self.fill_rect(canvas, tube.x - half, bottom, half, block_size, self.light_green)
+            self.fill_rect(canvas, tube.x, bottom, block_size * 3, block_size, self.green)
+            self.fill_rect(canvas, tube.x + block_size * 3, bottom, half, block_size, self.dark_green)
+
+            self.fill_rect(canvas, tube.x, bottom + block_size, half, self.h, self.light_green)
+            self.fill_rect(canvas, tube.x + half, bottom + block_size, block_size * 2, self.h, self.green)
+            self.fill_rect(canvas, tube.x + block_size * 2.5, bottom + block_size, half, self.h, self.dark_green)
+
+    def draw_bird(self, canvas, bird, mode="simple"):
+        for dx, dy, width, height, value in self.bird_sprites[mode]:
+            self.fill_rect(canvas, bird.x + dx, bird.y + dy, width, height, value)
+
+    def render_game(self, game, frame):
+        mode = "simple"
+
+        if game.rise_timer > 0:
+            mode = "up"
+        elif game.fall_timer > 0:
+            mode = "down"
+
+        canvas = self.canvas
+        canvas.fill(self.background)
+        self.draw_bird(canvas, game.bird, mode=mode)
+        self.draw_tubes(canvas, game.tubes)
+        self.downscale(canvas, frame)
+
+    def render(self, games, out=None):
+        if out is None:
+            out = np.empty((len(games),) + self.frame_shape, dtype=np.uint8)
+
+        for i, game in enumerate(games):
+            self.render_game(game, out[i])
+
+        return out
+
+
+class FrameDatasetWriter:
+    def __init__(self, directory, frame_shape, chunk_size=65536, metadata=None):
+        self.directory = directory
+        self.frame_shape = tuple(frame_shape)
+        self.chunk_size = chunk_size
+        self.metadata = dict(metadata or {})
+        self.chunk_lengths = []
+        self.frames = None
+        self.actions = None
+        self.rewards = None
+        self.game_overs = None
+        self.position = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def chunk_path(self, name, index):
+        return os.path.join(self.directory, '%s_%05d.npy' % (name, index))
+
+    def open_chunk(self):
+        index = len(self.chunk_lengths)
+        self.frames = np.lib.format.open_memmap(self.chunk_path('frames', index), mode='w+', dtype=np.uint8, shape=(self.chunk_size,) + self.frame_shape)
+        self.actions = np.lib.format.open_memmap(self.chunk_path('actions', index), mode='w+', dtype=np.int8, shape=(self.chunk_size,))
+        self.rewards = np.lib.format.open_memmap(self.chunk_path('rewards', index), mode='w+', dtype=np.int16, shape=(self.chunk_size,))
+        self.game_overs = np.lib.format.open_memmap(self.chunk_path('game_overs', index), mode='w+', dtype=np.bool_, shape=(self.chunk_size,))
+        self.chunk_lengths.append(0)
+        self.position = 0
+
+    def flush_chunk(self):
+        index = len(self.chunk_lengths) - 1
+        arrays = {'frames': self.frames, 'actions': self.actions, 'rewards': self.rewards, 'game_overs': self.game_overs}
+        for array in arrays.values():
+            array.flush()
+        self.chunk_lengths[-1] = self.position
+        self.frames = self.actions = self.rewards = self.game_overs = None
+
+        if self.position < self.chunk_size:
+            # a partial (last) chunk is copied to its real length, readers that skip metadata.json see no padding
+            for name in list(arrays):
+                array = arrays.pop(name)
+                path = self.chunk_path(name, index)
+                truncated = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=array.dtype, shape=(self.position,) + array.shape[1:])
+                truncated[:] = array[:self.position]
+                truncated.flush()
+                del truncated, array
+                os.replace(path + '.tmp', path)
+
+    def write(self, frames, actions, rewards, game_overs):
+        start = 0
+        count = len(frames)
+        while start < count:
+            if self.frames is None:
+                self.open_chunk()
+
+            n = min(count - start, self.chunk_size - self.position)
+            end = self.position + n
+            self.frames[self.position:end] = frames[start:start + n]
+            self.actions[self.position:end] = actions[start:start + n]
+            self.rewards[self.position:end] = rewards[start:start + n]
+            self.game_overs[self.position:end] = game_overs[start:start + n]
+            self.position = end
+            start += n
+
+            if self.position == self.chunk_size:
+                self.flush_chunk()
+
+    def close(self):
+        if self.frames is not None:
+            self.flush_chunk()
+
+        metadata = dict(self.metadata)
+        metadata.update({
+            'frame_shape': list(self.frame_shape),
+            'chunk_size': self.chunk_size,
+            'chunk_lengths': self.chunk_lengths,
+            'num_frames': int(sum(self.chunk_lengths)),
+        })
+        with open(os.path.join(self.directory, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def load_frame_dataset(directory):
+    with open(os.path.join(directory, 'metadata.json')) as f:
+        metadata = json.load(f)
+
+    chunks = []
+    for index, length in enumerate(metadata['chunk_lengths']):
+        chunk = {}
+        for name in ('frames', 'actions', 'rewards', 'game_overs'):
+            array = np.load(os.path.join(directory, '%s_%05d.npy' % (name, index)), mmap_mode='r')
+            chunk[name] = array[:length]
+        chunks.append(chunk)
+
+    return chunks
+
+
+def generate_frame_dataset(directory, num_frames, num_games=64, scale=8, chunk_size=65536, agent=None, epsilon=0.0, max_score=500, config=None):
+    games = [FlappyBirdGameAI(headless=True, config=config) for _ in range(num_games)]
+    renderer = OffscreenRenderer(scale=scale, config=games[0].config)
+
+    frames = np.empty((num_games,) + renderer.frame_shape, dtype=np.uint8)
+    actions = np.zeros(num_games, dtype=np.int8)
+    rewards = np.zeros(num_games, dtype=np.int16)
+    game_overs = np.zeros(num_games, dtype=np.bool_)
+
+    # frames are interleaved, frame i of the dataset comes from game i % num_games
+    metadata = {'num_games': num_games, 'scale': scale}
+    with FrameDatasetWriter(directory, renderer.frame_shape, chunk_size, metadata) as writer:
+        written = 0
+        while written < num_frames:
+            renderer.render(games, out=frames)
+
+            for i, game in enumerate(games):
+                if agent is None or np.random.uniform(0, 1) < epsilon:
+                    action = np.random.choice(3)
+                else:
+                    state, _ = agent.get_state(game)
+                    action = int(agent.policy[state])
+
+                reward, score, game_over = game.play(action)
+
+                if score > max_score:
+                    game_over = True
+
+                actions[i] = action
+                rewards[i] = reward
+                game_overs[i] = game_over
+
+                if game_over:
+                    game.reset()
+
+            n = min(num_games, num_frames - written)
+            writer.write(frames[:n], actions[:n], rewards[:n], game_overs[:n])
+            written += n
+
+    return written
@@ -0,0 +1,121 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+from flappy_bird_game_AI import FlappyBirdGameAI, GameConfig
+from agent import Agent
+
+
+def config_key(config):
+    return hashlib.sha1(json.dumps(config._asdict(), sort_keys=True).encode()).hexdigest()[:16]
+
+
+def config_distance(a, b):
+    # scale-free: log ratio per field, so speed 20 -> 30 counts as much as w 1280 -> 1920
+    return sum(abs(np.log(x / y)) for x, y in zip(a, b))
+
+
+def remap_q(Q, old_config, new_config):
+    # collision and height cases keep their meaning, only the next tube distance bins move
+    old_bins = old_config.distance_bins
+    new_bins = new_config.distance_bins
+    old_edges = np.linspace(0, old_config.w, old_bins)
+    new_edges = np.linspace(0, new_config.w, new_bins)
+
+    # the middle of each new bin, bin 0 is everything left of the bird
+    centers = np.empty(new_bins)
+    centers[0] = -1
+    centers[1:] = (new_edges[:-1] + new_edges[1:]) / 2
+    mapping = np.minimum(np.digitize(centers, old_edges), old_bins - 1)
+
+    old_Q = Q.reshape(3, 4, old_bins, -1)
+    return old_Q[:, :, mapping, :].reshape(3 * 4 * new_bins, -1).copy()
+
+
+class PolicyCache:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, 'index.json')
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def policy_path(self, config):
+        return os.path.join(self.directory, 'policy_' + config_key(config) + '.pkl')
+
+    def put(self, config, Q):
+        # a table stored under the wrong key would break every later warm start from it
+        Agent(config=config).check_q(Q)
+        with open(self.policy_path(config), 'wb') as f:
+            pickle.dump(Q, f)
+
+        self.index[config_key(config)] = config._asdict()
+        with open(self.index_path, 'w') as f:
+            json.dump(self.index, f, indent=1)
+
+    def get(self, config):
+        if config_key(config) not in self.index:
+            return None
+        with open(self.policy_path(config), 'rb') as f:
+            return pickle.load(f)
+
+    def nearest(self, config):
+        cached = [GameConfig(**fields) for fields in self.index.values()]
+        if not cached:
+            return None
+        return min(cached, key=lambda other: config_distance(config, other))
+
+    def warm_start(self, agent):
+        config = agent.config
+        Q = self.get(config)
+        if Q is not None:
+            agent.Q = agent.check_q(Q)
+            return config
+
+        nearest = self.nearest(config)
+        if nearest is None:
+            return None
+
+        agent.Q = remap_q(self.get(nearest), nearest, config)
+        return nearest
+
+
+def curriculum_configs(start, end, stages):
+    # integer fields interpolated from the easiest to the hardest configuration, the last stage is always `end`
+    if stages < 1:
+        raise ValueError('a curriculum needs at least 1 stage, got ' + str(stages))
+    if stages == 1:
+        return [GameConfig(*end)]
+    return [GameConfig(*(int(round(a + (b - a) * i / (stages - 1))) for a, b in zip(start, end))) for i in range(stages)]
+
+
+def curriculum_train(cache, configs, episodes_per_stage, alpha=0.1, gamma=0.995, epsilon_start=0.5, epsilon_end=0.001, epsilon_decay=0.995, verbose=False):
+    if not configs:
+        raise ValueError('curriculum_train needs at least one configuration')
+
+    agent = None
+    for config in configs:
+        agent = Agent(alpha, gamma, config)
+        source = cache.warm_start(agent)
+        # a warm start needs less exploration than training from zero
+        epsilon = 1.0 if source is None else epsilon_start
+
+        if verbose:
+            print("Stage: " + str(tuple(config)) + " warm start from: " + str(None if source is None else tuple(source)))
+
+        game = FlappyBirdGameAI(headless=True, config=config)
+        agent.temporal_difference_train(game, episodes_per_stage, epsilon, epsilon_end, epsilon_decay)
+        cache.put(config, agent.Q)
+
+    agent.build_policy()
+    return agent
+
+
+if __name__ == "__main__":
+    cache = PolicyCache('policy_cache')
+    easy = GameConfig(speed=15, spawn_interval=60, tube_gap=12)
+    hard = GameConfig(speed=25, spawn_interval=40, tube_gap=8)
+    curriculum_train(cache, curriculum_configs(easy, hard, 5), 2000, verbose=True)
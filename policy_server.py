@@ -0,0 +1,329 @@
+import os
+import stat
+import json
+import time
+import queue
+import pickle
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+from collections import deque
+import numpy as np
+from agent import Agent
+from flappy_bird_game_AI import GameConfig
+
+# request: kind (uint8) + count (uint32), then the payload
+HEADER = struct.Struct('<BI')
+
+STATES = 0
+OBSERVATIONS = 1
+RELOAD = 2
+STATS = 3
+
+OBSERVATION_SIZE = 6
+
+# action responses start with a status byte, an error is followed by a json message instead of the actions
+OK = 0
+ERROR = 1
+
+
+def is_socket(path):
+    return os.path.lexists(path) and stat.S_ISSOCK(os.lstat(path).st_mode)
+
+
+def recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError('connection closed')
+        received += n
+    return bytes(buffer)
+
+
+def send_json(sock, payload):
+    data = json.dumps(payload).encode()
+    sock.sendall(struct.pack('<I', len(data)) + data)
+
+
+def recv_json(sock):
+    size, = struct.unpack('<I', recv_exact(sock, 4))
+    return json.loads(recv_exact(sock, size))
+
+
+class PendingRequest:
+    def __init__(self, states):
+        self.states = states
+        self.actions = None
+        self.error = None
+        self.done = threading.Event()
+        self.received = time.perf_counter()
+
+
+class PolicyServer:
+    def __init__(self, policy_path, address, max_batch_size=4096, max_wait=0.0005, w=1280, h=800, config=None):
+        if config is None:
+            config = GameConfig(w=w, h=h)
+        self.config = config
+        self.address = address
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.w = config.w
+        self.h = config.h
+        self.agent = Agent(config=config)
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+
+        self.policy = None
+        self.policy_path = None
+        self.load_policy(policy_path)
+
+        self.started = time.time()
+        self.num_requests = 0
+        self.num_states = 0
+        self.num_batches = 0
+        self.num_reloads = 0
+        self.latencies = deque(maxlen=10000)
+        self.batch_sizes = deque(maxlen=10000)
+
+        self.server = None
+        self.running = False
+
+    def load_policy(self, file_name):
+        with open(file_name, 'rb') as f:
+            # the batcher indexes the table with client states, a table of another shape must not replace the current one
+            Q = self.agent.check_q(pickle.load(f))
+        policy = np.argmax(Q, axis=1).astype(np.int8)
+        # a single reference assignment, batches in flight keep the old table
+        self.policy = policy
+        self.policy_path = file_name
+
+    def observations_to_states(self, observations):
+        return self.agent.get_state_batch(observations[:, 0], observations[:, 4], observations[:, 5], self.w, self.h)
+
+    def submit(self, states):
+        request = PendingRequest(states)
+        self.requests.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise ValueError(request.error)
+        return request.actions
+
+    def check_states(self, states):
+        if len(states) > 0 and (states.min() < 0 or states.max() >= len(self.policy)):
+            raise ValueError('states must be in [0, ' + str(len(self.policy)) + ')')
+        return states
+
+    def batch_loop(self):
+        while self.running:
+            try:
+                first = self.requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            size = len(first.states)
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.states)
+
+            actions = None
+            error = None
+            try:
+                policy = self.policy
+                actions = policy[np.concatenate([request.states for request in batch])]
+            except Exception as e:
+                error = str(e)
+            finally:
+                # every waiting client is answered, a failed lookup must not leave submit() waiting forever
+                now = time.perf_counter()
+                offset = 0
+                with self.lock:
+                    for request in batch:
+                        n = len(request.states)
+                        if actions is None:
+                            request.error = error or 'policy lookup failed'
+                        else:
+                            request.actions = actions[offset:offset + n]
+                        offset += n
+                        self.latencies.append(now - request.received)
+                        request.done.set()
+                    self.num_requests += len(batch)
+                    self.num_states += size
+                    self.num_batches += 1
+                    self.batch_sizes.append(size)
+
+    def get_stats(self):
+        with self.lock:
+            latencies = np.array(self.latencies)
+            batch_sizes = np.array(self.batch_sizes)
+            elapsed = time.time() - self.started
+            stats = {
+                'policy_path': self.policy_path,
+                'uptime': elapsed,
+                'requests': self.num_requests,
+                'states': self.num_states,
+                'batches': self.num_batches,
+                'reloads': self.num_reloads,
+                'requests_per_second': self.num_requests / elapsed if elapsed > 0 else 0.0,
+                'states_per_second': self.num_states / elapsed if elapsed > 0 else 0.0,
+            }
+        if len(batch_sizes) > 0:
+            stats['mean_batch_size'] = float(batch_sizes.mean())
+        if len(latencies) > 0:
+            stats['latency_p50_ms'] = float(np.percentile(latencies, 50) * 1000)
+            stats['latency_p99_ms'] = float(np.percentile(latencies, 99) * 1000)
+        return stats
+
+    def handle_connection(self, sock):
+        while True:
+            try:
+                kind, count = HEADER.unpack(recv_exact(sock, HEADER.size))
+            except ConnectionError:
+                return
+
+            if kind == STATES or kind == OBSERVATIONS:
+                if kind == STATES:
+                    states = np.frombuffer(recv_exact(sock, 4 * count), dtype=np.int32)
+                else:
+                    observations = np.frombuffer(recv_exact(sock, 4 * OBSERVATION_SIZE * count), dtype=np.float32).reshape(count, OBSERVATION_SIZE)
+                    states = self.observations_to_states(observations)
+                try:
+                    actions = self.submit(self.check_states(states))
+                except ValueError as e:
+                    sock.sendall(bytes([ERROR]))
+                    send_json(sock, {'ok': False, 'error': str(e)})
+                    continue
+                sock.sendall(bytes([OK]) + actions.tobytes())
+            elif kind == RELOAD:
+                path = recv_exact(sock, count).decode()
+                try:
+                    self.load_policy(path)
+                    with self.lock:
+                        self.num_reloads += 1
+                    send_json(sock, {'ok': True, 'policy_path': path})
+                except (OSError, pickle.UnpicklingError, ValueError) as e:
+                    send_json(sock, {'ok': False, 'error': str(e)})
+            elif kind == STATS:
+                send_json(sock, self.get_stats())
+            else:
+                return
+
+    def make_server(self):
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server.handle_connection(self.request)
+
+        if isinstance(self.address, str):
+            # only a stale socket is replaced, a mistyped --unix must not delete a regular file
+            if is_socket(self.address):
+                os.unlink(self.address)
+            elif os.path.lexists(self.address):
+                raise FileExistsError(self.address + ' exists and is not a socket')
+
+            class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+                daemon_threads = True
+        else:
+            class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+                daemon_threads = True
+                allow_reuse_address = True
+
+        return Server(self.address, Handler)
+
+    def start(self):
+        self.server = self.make_server()
+        self.running = True
+        self.batcher = threading.Thread(target=self.batch_loop, daemon=True)
+        self.batcher.start()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            self.thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stop(self):
+        self.running = False
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if isinstance(self.address, str) and is_socket(self.address):
+            os.unlink(self.address)
+
+
+class PolicyClient:
+    def __init__(self, address):
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.connect(address)
+
+    def recv_actions(self, count):
+        status, = recv_exact(self.sock, 1)
+        if status == ERROR:
+            raise ValueError(recv_json(self.sock)['error'])
+        return np.frombuffer(recv_exact(self.sock, count), dtype=np.int8)
+
+    def get_actions(self, states):
+        states = np.ascontiguousarray(states, dtype=np.int32).reshape(-1)
+        self.sock.sendall(HEADER.pack(STATES, len(states)) + states.tobytes())
+        return self.recv_actions(len(states))
+
+    def get_actions_from_observations(self, observations):
+        observations = np.ascontiguousarray(observations, dtype=np.float32).reshape(-1, OBSERVATION_SIZE)
+        self.sock.sendall(HEADER.pack(OBSERVATIONS, len(observations)) + observations.tobytes())
+        return self.recv_actions(len(observations))
+
+    def reload(self, file_name):
+        path = os.path.abspath(file_name).encode()
+        self.sock.sendall(HEADER.pack(RELOAD, len(path)) + path)
+        return recv_json(self.sock)
+
+    def stats(self):
+        self.sock.sendall(HEADER.pack(STATS, 0))
+        return recv_json(self.sock)
+
+    def close(self):
+        self.sock.close()
+
+
+def parse_address(unix, host, port):
+    if unix:
+        return unix
+    return (host, port)
+
+
+if __name__ == "__main__":
+    from cli import add_config_arguments, make_config
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--policy', default='td_policy.pkl')
+    parser.add_argument('--unix', default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--max-batch-size', type=int, default=4096)
+    parser.add_argument('--max-wait', type=float, default=0.0005)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = PolicyServer(args.policy, parse_address(args.unix, args.host, args.port), args.max_batch_size, args.max_wait, config=make_config(args))
+    print('serving', args.policy, 'on', server.address)
+    server.serve_forever()
@@ -0,0 +1,139 @@
+import random
+import numpy as np
+from flappy_bird_game_AI import Action, Point, GameConfig
+from agent import Agent
+
+
+class PopulationFlappyBird:
+    def __init__(self, num_birds, w=1280, h=800, config=None):
+        if config is None:
+            config = GameConfig(w=w, h=h)
+        self.config = config
+        self.num_birds = num_birds
+        self.w = config.w
+        self.h = config.h
+        self.bird_x = 50
+        self.agent = Agent(config=config)
+        self.random = random.Random()
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.random.seed(seed)
+
+        self.bird_y = np.full(self.num_birds, self.h // 2, dtype=np.int64)
+        self.rise_timer = np.zeros(self.num_birds, dtype=np.int64)
+        self.fall_timer = np.zeros(self.num_birds, dtype=np.int64)
+        self.alive = np.ones(self.num_birds, dtype=bool)
+        self.scores = np.zeros(self.num_birds, dtype=np.int64)
+        self.frames = np.zeros(self.num_birds, dtype=np.int64)
+        self.tubes = []
+        self.tube_timer = 0
+        self.frame_count = 0
+
+    def spaw_tube(self):
+        block_size = self.config.block_size
+        tube = Point(self.w, self.random.randint(block_size * 4, self.h - 4 * block_size))
+        self.tubes.append(tube)
+
+    def move_tubes(self):
+        speed = self.config.speed
+        for i, tube in enumerate(self.tubes):
+            self.tubes[i] = tube._replace(x=tube.x - speed)
+
+    def remove_passed_tubes(self):
+        counter = 0
+        for i, tube in enumerate(self.tubes):
+            if tube.x < 0:
+                self.tubes.pop(i)
+                counter += 1
+
+        return counter
+
+    def get_states(self):
+        next_tube_x, next_tube_y = self.w, self.h // 2
+
+        if len(self.tubes) > 0:
+            next_tube_x = self.tubes[0].x
+            next_tube_y = self.tubes[0].y
+
+        return self.agent.get_state_batch(self.bird_y, next_tube_x - self.bird_x, next_tube_y, self.w, self.h)
+
+    def _move_birds(self, actions):
+        block_size = self.config.block_size
+        jump = self.alive & (actions == Action.JUMP.value)
+        dive = self.alive & (actions == Action.DIVE.value)
+
+        self.bird_y[jump] -= block_size
+        self.rise_timer[jump] = 6
+        self.fall_timer[jump] = 0
+
+        self.bird_y[dive] += block_size
+        self.fall_timer[dive] = 6
+        self.rise_timer[dive] = 0
+
+        rising = self.rise_timer > 0
+        falling = ~rising & (self.fall_timer > 0)
+        gliding = ~rising & ~falling
+
+        self.bird_y[self.alive & rising] -= block_size
+        self.bird_y[self.alive & falling] += block_size
+        self.bird_y[self.alive & gliding] += block_size // 2
+
+    def check_collisions(self):
+        block_size = self.config.block_size
+        gap = self.config.tube_gap * block_size // 2
+
+        if len(self.tubes) == 0:
+            return np.zeros(self.num_birds, dtype=bool)
+
+        closest_tube = self.tubes[0]
+
+        collided = np.zeros(self.num_birds, dtype=bool)
+        if self.bird_x + block_size >= closest_tube.x and self.bird_x <= closest_tube.x + block_size * 3:
+            collided = (self.bird_y <= closest_tube.y - gap) | (self.bird_y + block_size >= closest_tube.y + gap)
+
+        collided |= (self.bird_y < 0) | (self.bird_y > self.h - block_size)
+
+        return collided
+
+    def play(self, actions):
+        self.frame_count += 1
+        self.tube_timer += 1
+        self.rise_timer[self.alive] -= 1
+        self.fall_timer[self.alive] -= 1
+        self.frames[self.alive] += 1
+
+        if self.tube_timer == self.config.spawn_interval:
+            self.spaw_tube()
+            self.tube_timer = 0
+
+        self._move_birds(actions)
+
+        rewards = np.zeros(self.num_birds, dtype=np.int64)
+        died = self.alive & self.check_collisions()
+        rewards[died] = -10
+        self.alive &= ~died
+
+        self.move_tubes()
+        passed = self.remove_passed_tubes()
+        rewards[self.alive] = 10 * passed
+        self.scores[self.alive] += passed
+
+        return rewards, self.scores, died
+
+    def evaluate(self, policies, seed=None, max_score=10000):
+        # policies: (num_birds, num_states) greedy actions or (num_birds, num_states, num_actions) Q tables
+        policies = np.asarray(policies)
+        if policies.ndim == 3:
+            policies = np.argmax(policies, axis=2)
+
+        birds = np.arange(self.num_birds)
+        self.reset(seed)
+
+        while self.alive.any():
+            actions = policies[birds, self.get_states()]
+            self.play(actions)
+            self.alive &= self.scores <= max_score
+
+        return self.scores.copy()
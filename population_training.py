@@ -0,0 +1,193 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from flappy_bird_game_AI import FlappyBirdGameAI, GameConfig
+from agent import Agent
+from population_simulation import PopulationFlappyBird
+
+HYPERPARAMETER_BOUNDS = {
+    'alpha': (0.001, 1.0),
+    'gamma': (0.5, 0.9999),
+    'epsilon': (0.0, 1.0),
+    'epsilon_decay': (0.9, 0.99999),
+}
+
+
+class Individual:
+    def __init__(self, Q, alpha=0.1, gamma=0.995, epsilon=1.0, epsilon_decay=0.995):
+        self.Q = Q
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.epsilon_decay = epsilon_decay
+        self.fitness = None
+
+    def hyperparameters(self):
+        return {'alpha': self.alpha, 'gamma': self.gamma, 'epsilon': self.epsilon, 'epsilon_decay': self.epsilon_decay}
+
+
+def train_individual(Q, hyperparameters, seeds, epsilon_end=0.001, max_score=500, config=None, exploration_seed=None):
+    # forked workers inherit the parent's np.random state, reseed so exploration depends on the individual and not on the worker
+    if exploration_seed is not None:
+        np.random.seed(exploration_seed)
+    agent = Agent(hyperparameters['alpha'], hyperparameters['gamma'], config)
+    agent.Q = Q
+    game = FlappyBirdGameAI(headless=True, config=config)
+    epsilon = hyperparameters['epsilon']
+
+    for seed in seeds:
+        game.reset(seed=seed)
+        state, _ = agent.get_state(game)
+
+        game_over = False
+        while not game_over:
+            action = agent.choose_action(state, epsilon)
+            reward, score, game_over = game.play(action)
+
+            if score > max_score:
+                game_over = True
+
+            next_state, _ = agent.get_state(game)
+            agent.temporal_difference_update(state, action, reward, next_state)
+            state = next_state
+
+        if epsilon > epsilon_end:
+            epsilon *= hyperparameters['epsilon_decay']
+
+    return agent.Q, epsilon
+
+
+def evaluate_policies(policies, seeds, max_score=1000, config=None):
+    simulation = PopulationFlappyBird(len(policies), config=config)
+    scores = [simulation.evaluate(policies, seed=seed, max_score=max_score) for seed in seeds]
+    return np.mean(scores, axis=0)
+
+
+class PopulationTrainer:
+    def __init__(self, population_size=32, elite_size=4, train_episodes=20, eval_episodes=5, mutation_rate=0.1,
+                 mutation_scale=1.0, hyperparameter_mutation_scale=0.2, eval_max_score=1000, num_workers=None, seed=0, config=None, initial_Q=None):
+        self.config = config if config is not None else GameConfig()
+        agent = Agent(config=self.config)
+        self.num_states = agent.num_states
+        # a warm start table every individual of the first generation starts from, zeros otherwise
+        self.initial_Q = None if initial_Q is None else agent.check_q(np.array(initial_Q, dtype=float))
+        self.population_size = population_size
+        self.elite_size = elite_size
+        self.train_episodes = train_episodes
+        self.eval_episodes = eval_episodes
+        self.mutation_rate = mutation_rate
+        self.mutation_scale = mutation_scale
+        self.hyperparameter_mutation_scale = hyperparameter_mutation_scale
+        self.eval_max_score = eval_max_score
+        self.num_workers = num_workers or os.cpu_count()
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.generation = 0
+        self.history = []
+        self.population = [self.random_individual() for _ in range(population_size)]
+
+    def random_individual(self):
+        Q = np.zeros((self.num_states, Agent.num_actions)) if self.initial_Q is None else self.initial_Q.copy()
+        return Individual(
+            Q,
+            alpha=float(self.rng.uniform(0.02, 0.5)),
+            gamma=float(self.rng.uniform(0.9, 0.999)),
+            epsilon=float(self.rng.uniform(0.1, 1.0)),
+            epsilon_decay=float(self.rng.uniform(0.95, 0.999)),
+        )
+
+    def episode_seeds(self, count, offset):
+        # distinct per generation, identical for every individual of that generation
+        start = self.seed * 1000003 + self.generation * 10007 + offset
+        return list(range(start, start + count))
+
+    def exploration_seed(self, index):
+        return int(np.random.SeedSequence([self.seed, self.generation, index]).generate_state(1)[0])
+
+    def train(self, pool):
+        seeds = self.episode_seeds(self.train_episodes, 0)
+        futures = [pool.submit(train_individual, individual.Q, individual.hyperparameters(), seeds, config=self.config, exploration_seed=self.exploration_seed(i))
+                   for i, individual in enumerate(self.population)]
+        for individual, future in zip(self.population, futures):
+            individual.Q, individual.epsilon = future.result()
+
+    def evaluate(self, pool):
+        seeds = self.episode_seeds(self.eval_episodes, 5003)
+        policies = np.array([np.argmax(individual.Q, axis=1) for individual in self.population])
+        chunks = np.array_split(np.arange(len(policies)), self.num_workers)
+        futures = [(chunk, pool.submit(evaluate_policies, policies[chunk], seeds, self.eval_max_score, self.config)) for chunk in chunks if len(chunk) > 0]
+        for chunk, future in futures:
+            for i, fitness in zip(chunk, future.result()):
+                self.population[i].fitness = float(fitness)
+
+    def mutate_hyperparameter(self, name, value):
+        low, high = HYPERPARAMETER_BOUNDS[name]
+        if name in ('gamma', 'epsilon_decay'):
+            # perturb the horizon 1 / (1 - x) rather than x itself
+            value = 1 - (1 - value) * np.exp(self.rng.normal(0, self.hyperparameter_mutation_scale))
+        else:
+            value = value * np.exp(self.rng.normal(0, self.hyperparameter_mutation_scale))
+        return float(np.clip(value, low, high))
+
+    def crossover(self, a, b):
+        rows = self.rng.uniform(size=self.num_states) < 0.5
+        Q = np.where(rows[:, None], a.Q, b.Q)
+        parents = (a, b)
+        hyperparameters = {name: getattr(parents[self.rng.integers(2)], name) for name in HYPERPARAMETER_BOUNDS}
+        return Individual(Q, **hyperparameters)
+
+    def mutate(self, individual):
+        mask = self.rng.uniform(size=individual.Q.shape) < self.mutation_rate
+        individual.Q = individual.Q + mask * self.rng.normal(0, self.mutation_scale, size=individual.Q.shape)
+        for name in HYPERPARAMETER_BOUNDS:
+            setattr(individual, name, self.mutate_hyperparameter(name, getattr(individual, name)))
+        return individual
+
+    def select_parent(self, ranked):
+        # tournament of two among the better half
+        candidates = self.rng.integers(0, max(len(ranked) // 2, 1), size=2)
+        return ranked[candidates.min()]
+
+    def next_generation(self):
+        ranked = sorted(self.population, key=lambda individual: individual.fitness, reverse=True)
+        elites = ranked[:self.elite_size]
+        children = []
+        while len(elites) + len(children) < self.population_size:
+            child = self.crossover(self.select_parent(ranked), self.select_parent(ranked))
+            children.append(self.mutate(child))
+        self.population = elites + children
+
+    def best(self):
+        return max(self.population, key=lambda individual: individual.fitness if individual.fitness is not None else -np.inf)
+
+    def run(self, generations, verbose=False):
+        with ProcessPoolExecutor(self.num_workers) as pool:
+            for i in range(generations):
+                if self.train_episodes > 0:
+                    self.train(pool)
+                self.evaluate(pool)
+
+                fitness = np.array([individual.fitness for individual in self.population])
+                best = self.best()
+                self.history.append((fitness.max(), fitness.mean()))
+
+                if verbose:
+                    print("Generation: " + str(self.generation) + " Best: " + str(fitness.max()) + " Mean: " + str(fitness.mean()) +
+                          " alpha: " + str(round(best.alpha, 4)) + " gamma: " + str(round(best.gamma, 4)) + " epsilon: " + str(round(best.epsilon, 4)))
+
+                self.generation += 1
+                if i < generations - 1:
+                    self.next_generation()
+
+        return self.best()
+
+    def save_best(self, file_name):
+        agent = Agent(config=self.config)
+        agent.Q = self.best().Q
+        agent.save_policy(file_name)
+
+
+if __name__ == "__main__":
+    trainer = PopulationTrainer()
+    trainer.run(50, verbose=True)
+    trainer.save_best('population_policy.pkl')
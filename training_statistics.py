@@ -0,0 +1,186 @@
+import os
+import json
+import numpy as np
+
+EPISODE_DTYPE = np.dtype([('score', '<i4'), ('length', '<i4'), ('epsilon', '<f4')])
+
+
+class P2Quantile:
+    # Jain & Chlamtac P-square estimator: five markers, O(1) memory and time per observation
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(x)
+            heights.sort()
+            return
+
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= heights[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in range(1, 4):
+            d = self.desired[i] - self.positions[i]
+            if (d >= 1 and self.positions[i + 1] - self.positions[i] > 1) or (d <= -1 and self.positions[i - 1] - self.positions[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self.parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self.linear(i, d)
+                heights[i] = height
+                self.positions[i] += d
+
+    def parabolic(self, i, d):
+        n = self.positions
+        q = self.heights
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def linear(self, i, d):
+        n = self.positions
+        q = self.heights
+        return q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+
+    def value(self):
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return float(np.percentile(self.heights, 100 * self.p))
+        return float(self.heights[2])
+
+
+class TrainingStatistics:
+    def __init__(self, path=None, chunk_size=4096, window=100, quantiles=(0.5, 0.9, 0.99), summary_interval=100, overwrite=False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.window = window
+        self.summary_interval = summary_interval
+        self.buffer = np.zeros(chunk_size, dtype=EPISODE_DTYPE)
+        self.position = 0
+
+        self.episodes = 0
+        self.score_sum = 0
+        self.length_sum = 0
+        self.min_score = None
+        self.max_score = None
+        self.epsilon = None
+        self.rolling = np.zeros(window)
+        self.rolling_sum = 0.0
+        self.quantiles = [P2Quantile(q) for q in quantiles]
+
+        if path is not None and os.path.exists(path):
+            if overwrite:
+                os.remove(path)
+            else:
+                self.resume()
+
+    def resume(self):
+        # a restarted run appends to its history, the running statistics are rebuilt from it chunk by chunk
+        size = os.path.getsize(self.path)
+        if size % EPISODE_DTYPE.itemsize != 0:
+            # drop a record cut short by a crash mid-write
+            with open(self.path, 'r+b') as f:
+                f.truncate(size - size % EPISODE_DTYPE.itemsize)
+
+        history = load_history(self.path)
+        for start in range(0, len(history), self.chunk_size):
+            for score, length, epsilon in history[start:start + self.chunk_size].tolist():
+                self.update(score, length, epsilon)
+
+    def record(self, score, length, epsilon):
+        self.buffer[self.position] = (score, length, epsilon)
+        self.position += 1
+        if self.position == self.chunk_size:
+            self.spill()
+
+        self.update(score, length, epsilon)
+
+        if self.summary_interval and self.episodes % self.summary_interval == 0:
+            self.write_summary()
+
+    def update(self, score, length, epsilon):
+        slot = self.episodes % self.window
+        self.rolling_sum += score - self.rolling[slot]
+        self.rolling[slot] = score
+
+        self.episodes += 1
+        self.score_sum += score
+        self.length_sum += length
+        self.min_score = score if self.min_score is None else min(self.min_score, score)
+        self.max_score = score if self.max_score is None else max(self.max_score, score)
+        self.epsilon = epsilon
+        for quantile in self.quantiles:
+            quantile.add(score)
+
+    def spill(self):
+        if self.path is not None and self.position > 0:
+            with open(self.path, 'ab') as f:
+                self.buffer[:self.position].tofile(f)
+        self.position = 0
+        self.write_summary()
+
+    def rolling_scores(self):
+        # the last `window` scores, oldest first
+        if self.episodes < self.window:
+            return self.rolling[:self.episodes].copy()
+        return np.roll(self.rolling, -(self.episodes % self.window))
+
+    def rolling_mean(self):
+        count = min(self.episodes, self.window)
+        return float(self.rolling_sum / count) if count > 0 else 0.0
+
+    def summary(self):
+        return {
+            'episodes': self.episodes,
+            'mean_score': self.score_sum / self.episodes if self.episodes > 0 else 0.0,
+            'mean_length': self.length_sum / self.episodes if self.episodes > 0 else 0.0,
+            'rolling_mean_score': self.rolling_mean(),
+            'rolling_window': self.window,
+            'min_score': self.min_score,
+            'max_score': self.max_score,
+            'epsilon': self.epsilon,
+            'quantiles': {str(quantile.p): quantile.value() for quantile in self.quantiles},
+        }
+
+    def write_summary(self):
+        if self.path is None:
+            return
+        # written next to the final name and renamed, a dashboard never reads a half written file
+        with open(self.path + '.summary.json.tmp', 'w') as f:
+            json.dump(self.summary(), f)
+        os.replace(self.path + '.summary.json.tmp', self.path + '.summary.json')
+
+    def flush(self):
+        self.spill()
+
+    def close(self):
+        self.flush()
+
+
+def load_history(path):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=EPISODE_DTYPE)
+    return np.memmap(path, dtype=EPISODE_DTYPE, mode='r')
+
+
+def read_summary(path):
+    with open(path + '.summary.json') as f:
+        return json.load(f)
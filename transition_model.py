@@ -0,0 +1,47 @@
+import numpy as np
+
+
+class TransitionModel:
+    def __init__(self, num_states, num_actions):
+        self.num_states = num_states
+        self.num_actions = num_actions
+        self.counts = np.zeros((num_states, num_actions, num_states))
+        self.terminal_counts = np.zeros((num_states, num_actions))
+        self.reward_sums = np.zeros((num_states, num_actions))
+        self.visits = np.zeros((num_states, num_actions))
+
+    def update(self, state, action, reward, next_state, game_over):
+        self.visits[state, action] += 1
+        self.reward_sums[state, action] += reward
+        if game_over:
+            self.terminal_counts[state, action] += 1
+        else:
+            self.counts[state, action, next_state] += 1
+
+    def update_batch(self, states, actions, rewards, next_states, game_overs):
+        np.add.at(self.visits, (states, actions), 1)
+        np.add.at(self.reward_sums, (states, actions), rewards)
+        np.add.at(self.terminal_counts, (states[game_overs], actions[game_overs]), 1)
+        alive = ~game_overs
+        np.add.at(self.counts, (states[alive], actions[alive], next_states[alive]), 1)
+
+    def expected_rewards(self):
+        return np.divide(self.reward_sums, self.visits, out=np.zeros_like(self.reward_sums), where=self.visits > 0)
+
+    def transition_probabilities(self):
+        # terminal transitions are absorbing with value 0, so each row sums to 1 - P(game over)
+        return np.divide(self.counts, self.visits[:, :, None], out=np.zeros_like(self.counts), where=self.visits[:, :, None] > 0)
+
+    def backup(self, Q, gamma, state, action):
+        visits = self.visits[state, action]
+        if visits == 0:
+            return Q[state, action]
+        return (self.reward_sums[state, action] + gamma * self.counts[state, action] @ np.max(Q, axis=1)) / visits
+
+    def backups(self, V, gamma, states, actions):
+        visits = self.visits[states, actions]
+        targets = self.reward_sums[states, actions] + gamma * self.counts[states, actions] @ V
+        return np.divide(targets, visits, out=np.zeros_like(targets), where=visits > 0)
+
+    def predecessors(self, state):
+        return np.argwhere(self.counts[:, :, state] > 0)